@@ -0,0 +1,41 @@
+"""
+Small helpers shared by conftest.py and the test modules.
+"""
+
+import json
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
+TRUTHY = frozenset({"1", "true", "yes", "on", "True", "TRUE", "Yes", "YES", "On", "ON"})
+
+
+def is_truthy(value: str | None) -> bool:
+    if not value:
+        return False
+    return value in TRUTHY or value.strip().lower() in TRUTHY
+
+
+def json_loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def new_session() -> requests.Session:
+    """Keep-alive session with a pool sized for the harness's few hosts."""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return session
@@ -4,67 +4,208 @@ Pytest configuration and shared fixtures for routiium integration tests.
 This module sets up authentication tokens for testing in managed mode.
 """
 
-import json
 import os
+import signal
 import socket
 import subprocess
 import tempfile
 import time
 from pathlib import Path
+from urllib.parse import urlsplit
 
 import pytest
-import requests
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../../.env"))
+from ._harness import is_truthy, json_dumps, json_loads, new_session
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+_PYTHON_TESTS_DIR = _PROJECT_ROOT / "python_tests"
+
+# Load environment variables; set ROUTIIUM_TEST_NO_DOTENV to skip parsing
+# .env when the environment is already complete.
+if not os.environ.get("ROUTIIUM_TEST_NO_DOTENV"):
+    load_dotenv(dotenv_path=_PROJECT_ROOT / ".env", override=False)
 
 DEFAULT_VLLM_BASE = "http://100.69.61.40:8000"
 DEFAULT_VLLM_MODEL = "nemotron-nano-30b-fp8"
 
 
-def _set_default_env(key: str, value: str) -> None:
-    if not os.getenv(key):
-        os.environ[key] = value
+# Shared keep-alive session for the fixtures' control-plane requests.
+_SESSION = new_session()
 
 
-_set_default_env("VLLM_BASE", DEFAULT_VLLM_BASE)
-_set_default_env("VLLM_MODEL", DEFAULT_VLLM_MODEL)
-if not os.getenv("VLLM_ROUTE_MODEL"):
-    os.environ["VLLM_ROUTE_MODEL"] = f"vllm-{os.environ['VLLM_MODEL']}"
-if not os.getenv("ROUTIIUM_BACKENDS"):
-    vllm_base = os.environ["VLLM_BASE"].rstrip("/")
-    os.environ["ROUTIIUM_BACKENDS"] = f"prefix=vllm-,base={vllm_base}/v1,mode=chat"
+def _load_router_aliases(path: Path) -> dict | None:
+    # None means the file is absent; an unparsable file still yields {}.
+    if not path.is_file():
+        return None
+    try:
+        return json_loads(path.read_bytes())
+    except Exception:
+        return {}
+
+
+_ROUTER_ALIASES = _load_router_aliases(
+    _PYTHON_TESTS_DIR / "router_aliases.json"
+)
+
+
+def _apply_default_env() -> None:
+    # Empty values count as unset (e.g. ``VLLM_BASE=`` in .env), so this is a
+    # falsy check rather than os.environ.setdefault.
+    environ = os.environ
+    for key, value in (
+        ("VLLM_BASE", DEFAULT_VLLM_BASE),
+        ("VLLM_MODEL", DEFAULT_VLLM_MODEL),
+    ):
+        if not environ.get(key):
+            environ[key] = value
+
+    vllm_model = environ["VLLM_MODEL"]
+    vllm_base = environ["VLLM_BASE"].rstrip("/")
+    derived = {
+        "VLLM_ROUTE_MODEL": f"vllm-{vllm_model}",
+        "ROUTIIUM_BACKENDS": f"prefix=vllm-,base={vllm_base}/v1,mode=chat",
+    }
+    for key, value in derived.items():
+        if not environ.get(key):
+            environ[key] = value
+
+
+_apply_default_env()
+
+
+def _pick_free_port(attempts: int = 5) -> int:
+    # The probe socket never listens or connects, so it leaves no TIME_WAIT
+    # entry behind; SO_REUSEADDR only keeps the bind itself permissive. The
+    # port can still be claimed by someone else between close() and routiium's
+    # bind, and retrying here only covers transient failures of the bind itself.
+    last_error: OSError | None = None
+    for _ in range(attempts):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                sock.bind(("127.0.0.1", 0))
+            except OSError as exc:
+                last_error = exc
+                continue
+            return sock.getsockname()[1]
+    raise OSError(f"could not bind a free port after {attempts} attempts") from (
+        last_error
+    )
 
 
-def _is_truthy(value: str | None) -> bool:
-    if not value:
-        return False
-    return value.strip().lower() in {"1", "true", "yes", "on"}
+def _latest_source_mtime(root: Path) -> float:
+    """Newest mtime across the Cargo manifests and everything under src/."""
+    latest = 0.0
+    for name in ("Cargo.toml", "Cargo.lock"):
+        try:
+            latest = max(latest, os.stat(root / name).st_mtime)
+        except FileNotFoundError:
+            pass
+    # Walk all of src/, not just *.rs, so include_str! assets count too.
+    pending = [str(root / "src")]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    latest = max(latest, entry.stat().st_mtime)
+    return latest
+
+
+def _probe_status(host: str, port: int, host_header: str, path: str) -> bool:
+    """Send one raw ``GET`` over a fresh connection; True on HTTP 200."""
+    # create_connection resolves via getaddrinfo, so IPv6-only hosts work too.
+    with socket.create_connection((host, port), timeout=1) as sock:
+        sock.sendall(
+            f"GET {path} HTTP/1.1\r\nHost: {host_header}\r\n"
+            "Connection: close\r\n\r\n".encode("ascii")
+        )
+        head = b""
+        while b"\r\n" not in head:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return False
+            head += chunk
+        status_line = head.split(b"\r\n", 1)[0].split()
+        if len(status_line) < 2 or status_line[1] != b"200":
+            return False
+        # Drain briefly so the server closes cleanly instead of seeing a reset.
+        # The 200 is already in hand, so a slow or keep-alive peer is fine.
+        sock.settimeout(0.2)
+        drain_deadline = time.monotonic() + 0.2
+        try:
+            while time.monotonic() < drain_deadline and sock.recv(4096):
+                pass
+        except OSError:
+            pass
+    return True
 
 
-def _pick_free_port() -> int:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        sock.bind(("127.0.0.1", 0))
-        return sock.getsockname()[1]
+def _wait_for_status(base_url: str, timeout_seconds: int) -> bool:
+    parts = urlsplit(base_url)
+    host = parts.hostname or "127.0.0.1"
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    # netloc keeps the brackets around IPv6 literals; drop any userinfo.
+    host_header = parts.netloc.rsplit("@", 1)[-1] or host
+    status_path = f"{parts.path.rstrip('/')}/status"
+    deadline = time.monotonic() + timeout_seconds
+    delay = 0.02
+    while time.monotonic() < deadline:
+        if parts.scheme == "https":
+            # TLS endpoints still need a real client; only plain HTTP gets the
+            # raw-socket probe.
+            try:
+                if _SESSION.get(f"{base_url}/status", timeout=1).status_code == 200:
+                    return True
+            except Exception:
+                pass
+        else:
+            try:
+                if _probe_status(host, port, host_header, status_path):
+                    return True
+            except OSError:
+                pass
+        time.sleep(min(delay, max(0, deadline - time.monotonic())))
+        delay = min(delay * 1.5, 0.5)
+    return False
 
 
-def _wait_for_status(base_url: str, timeout_seconds: int) -> bool:
-    deadline = time.time() + timeout_seconds
-    while time.time() < deadline:
+def _stop_process_group(proc: subprocess.Popen, timeout_seconds: float = 2) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=timeout_seconds)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
         try:
-            resp = requests.get(f"{base_url}/status", timeout=1)
-            if resp.status_code == 200:
-                return True
-        except Exception:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
             pass
-        time.sleep(0.5)
-    return False
+        proc.wait()
+
+
+def _read_log_tail(log_path: str, max_bytes: int = 4096) -> str:
+    try:
+        with open(log_path, "rb") as fh:
+            fh.seek(max(0, os.fstat(fh.fileno()).st_size - max_bytes))
+            return fh.read().decode("utf-8", errors="replace")
+    except OSError:
+        return ""
+
+
+@pytest.fixture(scope="session")
+def http_session():
+    try:
+        yield _SESSION
+    finally:
+        _SESSION.close()
 
 
 @pytest.fixture(scope="session", autouse=True)
-def routiium_server():
-    use_external = _is_truthy(os.getenv("ROUTIIUM_TEST_USE_EXTERNAL"))
+def routiium_server(http_session):
+    use_external = is_truthy(os.getenv("ROUTIIUM_TEST_USE_EXTERNAL"))
     if use_external:
         base_url = os.getenv("ROUTIIUM_BASE", "http://127.0.0.1:8099")
         if not _wait_for_status(base_url, 5):
@@ -74,13 +215,15 @@ def routiium_server():
         yield base_url
         return
 
-    project_root = Path(__file__).resolve().parents[2]
-    python_tests_dir = project_root / "python_tests"
-    binary_path = project_root / "target" / "release" / "routiium"
+    binary_path = _PROJECT_ROOT / "target" / "release" / "routiium"
 
-    if not binary_path.exists():
+    binary_is_fresh = (
+        binary_path.exists()
+        and binary_path.stat().st_mtime >= _latest_source_mtime(_PROJECT_ROOT)
+    )
+    if not binary_is_fresh:
         build = subprocess.run(
-            ["cargo", "build", "--release"], cwd=str(project_root), check=False
+            ["cargo", "build", "--release"], cwd=str(_PROJECT_ROOT), check=False
         )
         if build.returncode != 0:
             pytest.exit("Failed to build routiium binary for tests")
@@ -96,19 +239,20 @@ def routiium_server():
     base_url = f"http://127.0.0.1:{port}"
     os.environ["ROUTIIUM_BASE"] = base_url
 
-    temp_dir = tempfile.TemporaryDirectory(prefix="routiium-test-")
+    # Keep sled and log writes in RAM when a writable tmpfs is available.
+    tmp_root = (
+        "/dev/shm"
+        if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK)
+        else None
+    )
+    temp_dir = tempfile.TemporaryDirectory(prefix="routiium-test-", dir=tmp_root)
     env = os.environ.copy()
     env["BIND_ADDR"] = bind_addr
     env["ROUTIIUM_SLED_PATH"] = os.path.join(temp_dir.name, "keys.db")
 
     cli_args = []
-    router_config_path = python_tests_dir / "router_aliases.json"
-    if router_config_path.is_file():
-        try:
-            with router_config_path.open("r", encoding="utf-8") as fh:
-                router_aliases = json.load(fh)
-        except Exception:
-            router_aliases = {}
+    if _ROUTER_ALIASES is not None:
+        router_aliases = dict(_ROUTER_ALIASES)
 
         vllm_route_model = os.getenv("VLLM_ROUTE_MODEL")
         vllm_model = os.getenv("VLLM_MODEL")
@@ -122,48 +266,49 @@ def routiium_server():
                 }
 
         router_tmp_path = Path(temp_dir.name) / "router_aliases.json"
-        with router_tmp_path.open("w", encoding="utf-8") as fh:
-            json.dump(router_aliases, fh)
+        router_fd = os.open(
+            router_tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644
+        )
+        try:
+            os.write(router_fd, json_dumps(router_aliases))
+        finally:
+            os.close(router_fd)
         cli_args.append(f"--router-config={router_tmp_path}")
 
-    mcp_config_path = python_tests_dir / "mcp" / "mcp.json"
+    mcp_config_path = _PYTHON_TESTS_DIR / "mcp" / "mcp.json"
     if mcp_config_path.is_file():
         cli_args.append(f"--mcp-config={mcp_config_path}")
 
-    system_prompt_config_path = python_tests_dir / "system_prompt.json"
+    system_prompt_config_path = _PYTHON_TESTS_DIR / "system_prompt.json"
     if system_prompt_config_path.is_file():
         cli_args.append(f"--system-prompt-config={system_prompt_config_path}")
         os.environ["ROUTIIUM_TEST_SYSTEM_PROMPT_PATH"] = str(system_prompt_config_path)
 
     log_path = os.path.join(temp_dir.name, "routiium-test.log")
-    log_file = open(log_path, "w", encoding="utf-8")
+    log_fd = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
     proc = subprocess.Popen(
         [str(binary_path), *cli_args],
-        cwd=str(project_root),
+        cwd=str(_PROJECT_ROOT),
         env=env,
-        stdout=log_file,
+        stdout=log_fd,
         stderr=subprocess.STDOUT,
+        close_fds=False,
+        start_new_session=True,
     )
 
     if not _wait_for_status(base_url, 30):
-        proc.terminate()
-        try:
-            proc.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            proc.kill()
-        log_file.close()
+        _stop_process_group(proc)
+        os.close(log_fd)
+        # The log lives in temp_dir, so surface it before the directory goes.
+        log_tail = _read_log_tail(log_path)
         temp_dir.cleanup()
-        pytest.exit(f"routiium failed to start; see log at {log_path}")
+        pytest.exit(f"routiium failed to start; log tail:\n{log_tail}")
 
     try:
         yield base_url
     finally:
-        proc.terminate()
-        try:
-            proc.wait(timeout=10)
-        except subprocess.TimeoutExpired:
-            proc.kill()
-        log_file.close()
+        _stop_process_group(proc)
+        os.close(log_fd)
         temp_dir.cleanup()
 
 
@@ -180,7 +325,7 @@ def setup_test_api_key(routiium_server):
 
     # Generate a temporary access token
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{base_url}/keys/generate",
             json={"label": "pytest-session", "ttl_seconds": 3600},
             timeout=5,
@@ -1,18 +1,55 @@
-import json
+import functools
 import os
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
 
 import pytest
-import requests
 
-
-def _post_chat(base_url, payload, token=None, timeout=120):
-    headers = {}
+from ._harness import is_truthy, json_dumps, json_loads, new_session
+
+_ENV_KEYS = (
+    "ROUTIIUM_BASE",
+    "VLLM_BASE",
+    "VLLM_MODEL",
+    "VLLM_ROUTE_MODEL",
+    "VLLM_API_KEY",
+    "ROUTIIUM_ACCESS_TOKEN",
+    "OPENAI_API_KEY",
+    "VLLM_E2E_DISABLE",
+    "VLLM_STRICT_MATCH",
+    "VLLM_REQUIRE_REASONING",
+    "ROUTIIUM_TEST_SYSTEM_PROMPT_PATH",
+)
+
+_DEFAULT_PROMPT_PATH = Path(__file__).resolve().parents[1] / "system_prompt.json"
+
+
+@pytest.fixture(scope="module")
+def chat_sessions():
+    # requests.Session is not thread-safe, so the direct and routed calls that
+    # run concurrently each get their own keep-alive session.
+    direct, routed = new_session(), new_session()
+    try:
+        yield direct, routed
+    finally:
+        direct.close()
+        routed.close()
+
+
+@pytest.fixture(scope="session")
+def vllm_env(setup_test_api_key):
+    # Snapshot once the session fixtures have exported ROUTIIUM_BASE and the
+    # access token; the test then reads plain dict entries instead of getenv.
+    return {key: os.environ.get(key) for key in _ENV_KEYS}
+
+
+def _post_chat(session, base_url, body, token=None, timeout=120):
+    headers = {"Content-Type": "application/json"}
     if token:
         headers["Authorization"] = f"Bearer {token}"
-    resp = requests.post(
+    resp = session.post(
         f"{base_url}/v1/chat/completions",
-        json=payload,
+        data=body,
         headers=headers,
         timeout=timeout,
     )
@@ -20,18 +57,17 @@ def _post_chat(base_url, payload, token=None, timeout=120):
         pytest.fail(
             f"POST {base_url}/v1/chat/completions failed: {resp.status_code} {resp.text}"
         )
-    return resp.json()
+    return json_loads(resp.content)
 
 
-def _load_system_prompt_config():
-    path = os.getenv("ROUTIIUM_TEST_SYSTEM_PROMPT_PATH")
-    if not path:
-        path = Path(__file__).resolve().parents[1] / "system_prompt.json"
+@functools.lru_cache(maxsize=4)
+def _load_system_prompt_config(path):
+    # Keyed on the path, so a different ROUTIIUM_TEST_SYSTEM_PROMPT_PATH is
+    # never served a config parsed from another file.
     path = Path(path)
     if not path.is_file():
         return None
-    with path.open("r", encoding="utf-8") as fh:
-        return json.load(fh)
+    return json_loads(path.read_bytes())
 
 
 def _prompt_for_model(config, model, api):
@@ -53,9 +89,10 @@ def _apply_prompt(messages, prompt, mode):
     system_message = {"role": "system", "content": prompt}
     if mode == "append":
         idx = None
-        for i, msg in enumerate(messages):
-            if msg.get("role") == "system":
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].get("role") == "system":
                 idx = i
+                break
         if idx is not None:
             return messages[: idx + 1] + [system_message] + messages[idx + 1 :]
         return list(messages) + [system_message]
@@ -64,39 +101,34 @@ def _apply_prompt(messages, prompt, mode):
     return [system_message] + list(messages)
 
 
-def _normalize_message(resp):
-    choice = resp.get("choices", [{}])[0]
-    return choice.get("message", {})
-
-
-def _is_truthy(value):
-    if not value:
-        return False
-    return value.strip().lower() in {"1", "true", "yes", "on"}
-
-
-def _final_text(msg):
+def _msg_and_text(resp):
+    choices = resp.get("choices")
+    msg = choices[0].get("message", {}) if choices else {}
     content = msg.get("content")
-    if isinstance(content, str) and content.strip():
-        return content
+    if type(content) is str and content.strip():
+        return msg, content
     reasoning = msg.get("reasoning_content")
-    if isinstance(reasoning, str) and reasoning.strip():
-        return reasoning
-    return ""
+    if type(reasoning) is str and reasoning.strip():
+        return msg, reasoning
+    return msg, ""
 
 
-def test_vllm_chat_forwarding_and_reasoning_content():
-    if _is_truthy(os.getenv("VLLM_E2E_DISABLE")):
+def test_vllm_chat_forwarding_and_reasoning_content(vllm_env, chat_sessions):
+    if is_truthy(vllm_env.get("VLLM_E2E_DISABLE")):
         pytest.skip("VLLM_E2E_DISABLE set")
 
-    routiium_base = os.getenv("ROUTIIUM_BASE", "http://127.0.0.1:8099")
-    vllm_base = os.getenv("VLLM_BASE", "http://100.69.61.40:8000")
-    vllm_model = os.getenv("VLLM_MODEL", "nemotron-nano-30b-fp8")
-    route_model = os.getenv("VLLM_ROUTE_MODEL", vllm_model)
-    vllm_token = os.getenv("VLLM_API_KEY")
-    routiium_token = os.getenv("ROUTIIUM_ACCESS_TOKEN") or os.getenv("OPENAI_API_KEY")
+    routiium_base = vllm_env.get("ROUTIIUM_BASE") or "http://127.0.0.1:8099"
+    vllm_base = vllm_env.get("VLLM_BASE") or "http://100.69.61.40:8000"
+    vllm_model = vllm_env.get("VLLM_MODEL") or "nemotron-nano-30b-fp8"
+    route_model = vllm_env.get("VLLM_ROUTE_MODEL") or vllm_model
+    vllm_token = vllm_env.get("VLLM_API_KEY")
+    routiium_token = vllm_env.get("ROUTIIUM_ACCESS_TOKEN") or vllm_env.get(
+        "OPENAI_API_KEY"
+    )
 
-    config = _load_system_prompt_config()
+    config = _load_system_prompt_config(
+        vllm_env.get("ROUTIIUM_TEST_SYSTEM_PROMPT_PATH") or _DEFAULT_PROMPT_PATH
+    )
     prompt, mode = _prompt_for_model(config, route_model, "chat")
 
     base_messages = [{"role": "user", "content": "Write a short 4-line poem."}]
@@ -122,14 +154,38 @@ def test_vllm_chat_forwarding_and_reasoning_content():
         **common_params,
     }
 
-    direct_resp = _post_chat(vllm_base, direct_payload, token=vllm_token)
-    routed_resp = _post_chat(routiium_base, routed_payload, token=routiium_token)
+    # The direct and routed requests are independent; run them concurrently.
+    # If either fails, report it at once instead of waiting out the other call.
+    direct_session, routed_session = chat_sessions
+    executor = ThreadPoolExecutor(max_workers=2)
+    try:
+        direct_future = executor.submit(
+            _post_chat,
+            direct_session,
+            vllm_base,
+            json_dumps(direct_payload),
+            token=vllm_token,
+        )
+        routed_future = executor.submit(
+            _post_chat,
+            routed_session,
+            routiium_base,
+            json_dumps(routed_payload),
+            token=routiium_token,
+        )
+        done, _ = wait((direct_future, routed_future), return_when=FIRST_EXCEPTION)
+        for future in done:
+            future.result()
+        direct_resp = direct_future.result()
+        routed_resp = routed_future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    direct_msg = _normalize_message(direct_resp)
-    routed_msg = _normalize_message(routed_resp)
+    direct_msg, direct_text = _msg_and_text(direct_resp)
+    routed_msg, routed_text = _msg_and_text(routed_resp)
 
-    strict_match = _is_truthy(os.getenv("VLLM_STRICT_MATCH"))
-    require_reasoning = _is_truthy(os.getenv("VLLM_REQUIRE_REASONING"))
+    strict_match = is_truthy(vllm_env.get("VLLM_STRICT_MATCH"))
+    require_reasoning = is_truthy(vllm_env.get("VLLM_REQUIRE_REASONING"))
 
     direct_reasoning = direct_msg.get("reasoning_content")
     routed_reasoning = routed_msg.get("reasoning_content")
@@ -141,8 +197,6 @@ def test_vllm_chat_forwarding_and_reasoning_content():
         if strict_match:
             assert routed_reasoning == direct_reasoning
 
-    direct_text = _final_text(direct_msg)
-    routed_text = _final_text(routed_msg)
     assert direct_text, "Direct response missing final text"
     assert routed_text, "Routed response missing final text"
     if strict_match: